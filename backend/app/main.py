@@ -10,6 +10,8 @@ from pymongo import UpdateOne
 from bson import ObjectId
 from .services.audio import extract_features_from_bytes
 from .services.db import get_db, init_db
+from .services.cache import recommend_cache
+from .services import recommend as recommend_service
 from dotenv import load_dotenv
 import os
 
@@ -76,6 +78,7 @@ async def upload_and_extract(file: UploadFile = File(...)):
         **feats
     }
     result = await db.songs.insert_one(song)
+    recommend_service.catalog_changed()
     return {"song_id": str(result.inserted_id), "features": feats}
 
 
@@ -109,42 +112,14 @@ async def run_kmeans(k: int = Query(8, ge=2, le=64)):
     
     if operations:
         await db.songs.bulk_write(operations)
+        recommend_service.catalog_changed()
     
     return {"clusters": int(k)}
 
 
 @app.post("/recommend")
 async def recommend(req: RecommendRequest):
-    db = get_db()
-    query = {}
-    if req.mood_box is not None:
-        e_min, e_max, v_min, v_max = req.mood_box
-        query = {
-            "energy": {"$gte": e_min, "$lte": e_max},
-            "valence": {"$gte": v_min, "$lte": v_max}
-        }
-    
-    songs = await db.songs.find(query).to_list(length=None)
-    if not songs:
-        return {"items": []}
-    
-    # Calculate center point
-    if req.mood_box is not None:
-        center = np.array([(req.mood_box[0]+req.mood_box[1])/2, (req.mood_box[2]+req.mood_box[3])/2])
-    else:
-        center = np.array([0.5, 0.5])
-    
-    # Score songs by distance to center
-    scored = []
-    for song in songs:
-        p = np.array([song["energy"], song["valence"]])
-        dist = float(np.linalg.norm(p - center))
-        scored.append((str(song["_id"]), song["title"], 1.0/(1e-6+dist)))
-    
-    scored.sort(key=lambda x: x[2], reverse=True)
-    top = scored[:max(10, req.k*4)]
-    
-    return {"items": [{"song_id": sid, "title": title, "score": sc} for sid, title, sc in top]}
+    return await recommend_service.recommend_by_mood(req.mood_box, req.k)
 
 
 @app.get("/health")
@@ -152,31 +127,15 @@ def health():
     return {"ok": True}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    return recommend_cache.stats()
+
+
 # New: GET variant for recommend by song_id, plus cluster/mood endpoints
 @app.get("/recommend")
 async def recommend_by_song(song_id: str | None = None, k: int = 10):
-    db = get_db()
-    
-    if song_id is not None:
-        from bson import ObjectId
-        seed = await db.songs.find_one({"_id": ObjectId(song_id)})
-        if not seed:
-            return {"items": []}
-        center = np.array([seed["energy"], seed["valence"]])
-    else:
-        center = np.array([0.5, 0.5])
-    
-    songs = await db.songs.find().to_list(length=None)
-    scored = []
-    for song in songs:
-        p = np.array([song["energy"], song["valence"]])
-        dist = float(np.linalg.norm(p - center))
-        scored.append((str(song["_id"]), song["title"], 1.0/(1e-6+dist)))
-    
-    scored.sort(key=lambda x: x[2], reverse=True)
-    top = scored[:k]
-    
-    return {"items": [{"song_id": sid, "title": title, "score": sc} for sid, title, sc in top]}
+    return await recommend_service.recommend_by_song(song_id, k)
 
 
 @app.get("/get_mood_clusters")
@@ -213,24 +172,4 @@ async def get_playlist_by_mood(
     v_max: float | None = None,
     k: int = 20
 ):
-    db = get_db()
-    query = {}
-    
-    if cluster is not None:
-        query["cluster"] = cluster
-    if e_min is not None and e_max is not None:
-        query["energy"] = {"$gte": e_min, "$lte": e_max}
-    if v_min is not None and v_max is not None:
-        query["valence"] = {"$gte": v_min, "$lte": v_max}
-    songs = await db.songs.find(query).limit(k).to_list(length=None)
-    return {
-        "items": [
-            {
-                "song_id": str(s["_id"]),
-                "title": s["title"],
-                "energy": s["energy"],
-                "valence": s["valence"]
-            } for s in songs
-        ]
-    }
-
+    return await recommend_service.playlist_by_mood(cluster, e_min, e_max, v_min, v_max, k)
@@ -3,6 +3,7 @@ from typing import Optional, List
 import numpy as np
 from bson import ObjectId
 from ..services.db import get_db
+from ..services import recommend as recommend_service
 from ..services.audio import extract_features_from_bytes
 
 router = APIRouter()
@@ -20,6 +21,7 @@ async def upload_and_extract(file: UploadFile = File(...)):
         **feats
     }
     result = await db.songs.insert_one(song)
+    recommend_service.catalog_changed()
     return {"song_id": str(result.inserted_id), "features": feats}
 
 @router.post("/cluster/run")
@@ -52,33 +54,14 @@ async def run_kmeans(k: int = Query(8, ge=2, le=64)):
     
     if operations:
         await db.songs.bulk_write(operations)
+        recommend_service.catalog_changed()
     
     return {"clusters": int(k)}
 
 @router.get("/recommend")
 async def recommend_by_song(song_id: str | None = None, k: int = 10):
     """Get song recommendations based on a seed song"""
-    db = get_db()
-    
-    if song_id is not None:
-        seed = await db.songs.find_one({"_id": ObjectId(song_id)})
-        if not seed:
-            return {"items": []}
-        center = np.array([seed["energy"], seed["valence"]])
-    else:
-        center = np.array([0.5, 0.5])
-    
-    songs = await db.songs.find().to_list(length=None)
-    scored = []
-    for song in songs:
-        p = np.array([song["energy"], song["valence"]])
-        dist = float(np.linalg.norm(p - center))
-        scored.append((str(song["_id"]), song["title"], 1.0/(1e-6+dist)))
-    
-    scored.sort(key=lambda x: x[2], reverse=True)
-    top = scored[:k]
-    
-    return {"items": [{"song_id": sid, "title": title, "score": sc} for sid, title, sc in top]}
+    return await recommend_service.recommend_by_song(song_id, k)
 
 @router.get("/get_mood_clusters")
 async def get_mood_clusters():
@@ -115,24 +98,4 @@ async def get_playlist_by_mood(
     k: int = 20
 ):
     """Get a playlist based on mood parameters or cluster"""
-    db = get_db()
-    query = {}
-    
-    if cluster is not None:
-        query["cluster"] = cluster
-    if e_min is not None and e_max is not None:
-        query["energy"] = {"$gte": e_min, "$lte": e_max}
-    if v_min is not None and v_max is not None:
-        query["valence"] = {"$gte": v_min, "$lte": v_max}
-    
-    songs = await db.songs.find(query).limit(k).to_list(length=None)
-    return {
-        "items": [
-            {
-                "song_id": str(s["_id"]),
-                "title": s["title"],
-                "energy": s["energy"],
-                "valence": s["valence"]
-            } for s in songs
-        ]
-    }
\ No newline at end of file
+    return await recommend_service.playlist_by_mood(cluster, e_min, e_max, v_min, v_max, k)
\ No newline at end of file
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+# Response cache settings
+CACHE_MAX_ENTRIES = int(os.getenv("RECOMMEND_CACHE_SIZE", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+CACHE_MAX_ITEMS = int(os.getenv("RECOMMEND_CACHE_MAX_ITEMS", "100000"))
+
+
+def count_items(value: Any) -> int:
+    """Weight of a cached response: the number of songs it lists"""
+    if isinstance(value, dict) and isinstance(value.get("items"), list):
+        return max(1, len(value["items"]))
+    return 1
+
+
+class ResponseCache:
+    """LRU/TTL cache for query responses, invalidated by a catalog version.
+
+    Memory is bounded by both the number of entries and the total weight
+    (songs listed) of the cached responses. Concurrent misses for the same
+    key share one in-flight computation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL_SECONDS,
+        max_items: int = CACHE_MAX_ITEMS,
+        weigh: Callable[[Any], int] = count_items,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_items = max_items
+        self.weigh = weigh
+        self.items = 0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, int, Any]]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def bump_version(self) -> int:
+        """Mark the catalog as changed and drop every cached response"""
+        self.version += 1
+        self._entries.clear()
+        self.items = 0
+        return self.version
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached response for key, computing it at most once"""
+        key = (self.version, key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._evict(key)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # Shield so one cancelled caller does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        # Results computed against an older catalog are not worth keeping
+        if key[0] != self.version:
+            return
+        value = task.result()
+        weight = self.weigh(value)
+        # A single response larger than the whole budget is served but not kept
+        if weight > self.max_items:
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (time.monotonic() + self.ttl, weight, value)
+        self.items += weight
+        while len(self._entries) > self.max_entries or self.items > self.max_items:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: Hashable) -> None:
+        _, weight, _ = self._entries.pop(key)
+        self.items -= weight
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "items": self.items,
+            "max_items": self.max_items,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+recommend_cache = ResponseCache()
@@ -0,0 +1,120 @@
+import numpy as np
+from bson import ObjectId
+from .db import get_db
+from .cache import recommend_cache
+
+
+def _mood_range(lo, hi):
+    """Normalise a (min, max) filter; a half-open pair is ignored like before"""
+    if lo is None or hi is None:
+        return None
+    return (float(lo), float(hi))
+
+
+def _score(songs, center):
+    """Rank songs by inverse distance to a point in energy/valence space"""
+    scored = []
+    for song in songs:
+        p = np.array([song["energy"], song["valence"]])
+        dist = float(np.linalg.norm(p - center))
+        scored.append((str(song["_id"]), song["title"], 1.0/(1e-6+dist)))
+
+    scored.sort(key=lambda x: x[2], reverse=True)
+    return scored
+
+
+def catalog_changed():
+    """Invalidate cached responses after songs or clusters change"""
+    return recommend_cache.bump_version()
+
+
+async def recommend_by_mood(mood_box, k):
+    """Recommendations ranked around the centre of a mood box"""
+    if mood_box is not None:
+        mood_box = tuple(float(v) for v in mood_box)
+    return await recommend_cache.get_or_compute(
+        ("recommend", mood_box, k),
+        lambda: _recommend_by_mood(mood_box, k),
+    )
+
+
+async def _recommend_by_mood(mood_box, k):
+    db = get_db()
+    query = {}
+    if mood_box is not None:
+        e_min, e_max, v_min, v_max = mood_box
+        query = {
+            "energy": {"$gte": e_min, "$lte": e_max},
+            "valence": {"$gte": v_min, "$lte": v_max}
+        }
+
+    songs = await db.songs.find(query).to_list(length=None)
+    if not songs:
+        return {"items": []}
+
+    # Calculate center point
+    if mood_box is not None:
+        center = np.array([(mood_box[0]+mood_box[1])/2, (mood_box[2]+mood_box[3])/2])
+    else:
+        center = np.array([0.5, 0.5])
+
+    top = _score(songs, center)[:max(10, k*4)]
+    return {"items": [{"song_id": sid, "title": title, "score": sc} for sid, title, sc in top]}
+
+
+async def recommend_by_song(song_id, k):
+    """Recommendations ranked around a seed song"""
+    return await recommend_cache.get_or_compute(
+        ("recommend_by_song", song_id, k),
+        lambda: _recommend_by_song(song_id, k),
+    )
+
+
+async def _recommend_by_song(song_id, k):
+    db = get_db()
+
+    if song_id is not None:
+        seed = await db.songs.find_one({"_id": ObjectId(song_id)})
+        if not seed:
+            return {"items": []}
+        center = np.array([seed["energy"], seed["valence"]])
+    else:
+        center = np.array([0.5, 0.5])
+
+    songs = await db.songs.find().to_list(length=None)
+    top = _score(songs, center)[:k]
+    return {"items": [{"song_id": sid, "title": title, "score": sc} for sid, title, sc in top]}
+
+
+async def playlist_by_mood(cluster, e_min, e_max, v_min, v_max, k):
+    """Playlist of songs in a cluster and/or energy/valence ranges"""
+    e_range = _mood_range(e_min, e_max)
+    v_range = _mood_range(v_min, v_max)
+    return await recommend_cache.get_or_compute(
+        ("playlist", cluster, e_range, v_range, k),
+        lambda: _playlist_by_mood(cluster, e_range, v_range, k),
+    )
+
+
+async def _playlist_by_mood(cluster, e_range, v_range, k):
+    db = get_db()
+    query = {}
+
+    if cluster is not None:
+        query["cluster"] = cluster
+    if e_range is not None:
+        query["energy"] = {"$gte": e_range[0], "$lte": e_range[1]}
+    if v_range is not None:
+        query["valence"] = {"$gte": v_range[0], "$lte": v_range[1]}
+
+    songs = await db.songs.find(query).limit(k).to_list(length=None)
+    return {
+        "items": [
+            {
+                "song_id": str(s["_id"]),
+                "title": s["title"],
+                "energy": s["energy"],
+                "valence": s["valence"]
+            } for s in songs
+        ]
+    }
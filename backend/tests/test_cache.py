@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app.services.cache import ResponseCache
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"items": [calls]}
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_compute("seed", compute) for _ in range(5)])
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["inflight"] == 0
+
+
+def test_bump_version_discards_inflight_result():
+    cache = ResponseCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        task = asyncio.ensure_future(cache.get_or_compute("seed", compute))
+        await asyncio.sleep(0)
+        cache.bump_version()
+        stale = await task
+        fresh = await cache.get_or_compute("seed", compute)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert (stale, fresh) == (1, 2)
+    assert cache.stats()["size"] == 1
+
+
+def test_exceptions_are_not_cached():
+    cache = ResponseCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("db down")
+        return "ok"
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("seed", compute)
+        return await cache.get_or_compute("seed", compute)
+
+    assert asyncio.run(run()) == "ok"
+    assert calls == 2
+    assert cache.stats()["inflight"] == 0
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=0.02)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def run():
+        first = await cache.get_or_compute("seed", compute)
+        hit = await cache.get_or_compute("seed", compute)
+        await asyncio.sleep(0.05)
+        expired = await cache.get_or_compute("seed", compute)
+        return first, hit, expired
+
+    assert asyncio.run(run()) == (1, 1, 2)
+    assert cache.stats()["hits"] == 1
+
+
+def test_lru_eviction_at_max_entries():
+    cache = ResponseCache(max_entries=2)
+    calls = []
+
+    def compute_for(key):
+        async def compute():
+            calls.append(key)
+            return key
+        return compute
+
+    async def run():
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await cache.get_or_compute(key, compute_for(key))
+
+    asyncio.run(run())
+    # "b" was least recently used when "c" arrived, so only it is recomputed
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.stats()["size"] == 2
+
+
+def test_total_items_bound_evicts_lru():
+    cache = ResponseCache(max_items=5)
+
+    def compute_for(n):
+        async def compute():
+            return {"items": list(range(n))}
+        return compute
+
+    async def run():
+        await cache.get_or_compute("a", compute_for(2))
+        await cache.get_or_compute("b", compute_for(2))
+        await cache.get_or_compute("c", compute_for(3))
+        await cache.get_or_compute("huge", compute_for(6))
+
+    asyncio.run(run())
+    stats = cache.stats()
+    # "a" made way for "c"; "huge" exceeds the budget on its own and is not kept
+    assert (stats["size"], stats["items"]) == (2, 5)
@@ -0,0 +1,165 @@
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from bson import ObjectId
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+
+# The music router loads a MusicGen checkpoint at import; these tests do not need it
+sys.modules.setdefault("app.routers.music", types.SimpleNamespace(router=APIRouter()))
+
+from app import main  # noqa: E402
+from app.routers import mood  # noqa: E402
+from app.services import cache, recommend  # noqa: E402
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        value = doc.get(field)
+        if isinstance(cond, dict):
+            if value is None or not cond["$gte"] <= value <= cond["$lte"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def limit(self, n):
+        # Mongo: 0 means no limit, a negative limit returns the first |n|
+        return FakeCursor(self.docs if n == 0 else self.docs[:abs(n)])
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class FakeSongs:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query=None, projection=None):
+        self.finds += 1
+        return FakeCursor([d for d in self.docs if _matches(d, query or {})])
+
+    async def find_one(self, query):
+        return next((d for d in self.docs if _matches(d, query)), None)
+
+    async def insert_one(self, doc):
+        doc["_id"] = ObjectId()
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def bulk_write(self, operations):
+        for op in operations:
+            for doc in self.docs:
+                if _matches(doc, op._filter):
+                    doc.update(op._doc["$set"])
+
+
+def _song(title, energy, valence):
+    return {
+        "_id": ObjectId(),
+        "title": title,
+        "artist": "unknown",
+        "energy": energy,
+        "valence": valence,
+        "danceability": 0.5,
+        "tempo": 120.0,
+    }
+
+
+@pytest.fixture
+def songs(monkeypatch):
+    collection = FakeSongs([
+        _song("below", 0.334, 0.5),
+        _song("edge", 0.337, 0.5),
+        _song("middle", 0.6, 0.6),
+        _song("calm", 0.1, 0.2),
+    ])
+    db = SimpleNamespace(songs=collection)
+    for module in (main, mood, recommend):
+        monkeypatch.setattr(module, "get_db", lambda: db)
+    fresh = cache.ResponseCache()
+    monkeypatch.setattr(recommend, "recommend_cache", fresh)
+    monkeypatch.setattr(main, "recommend_cache", fresh)
+    return collection
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def _titles(response):
+    assert response.status_code == 200
+    return [item["title"] for item in response.json()["items"]]
+
+
+def test_recommend_off_grid_box_keeps_exact_bounds_and_hits(songs, client):
+    body = {"mood_box": [0.335, 0.9, 0.0, 1.0], "k": 1}
+    first = client.post("/recommend", json=body)
+    assert sorted(_titles(first)) == ["edge", "middle"]
+
+    finds = songs.finds
+    second = client.post("/recommend", json=body)
+    assert second.json() == first.json()
+    assert songs.finds == finds
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+
+def test_playlist_off_grid_box_matches_on_both_routes(songs, client):
+    params = {"e_min": 0.335, "e_max": 0.9, "v_min": 0.0, "v_max": 1.0}
+    assert _titles(client.get("/get_playlist_by_mood", params=params)) == ["edge", "middle"]
+    assert _titles(client.get("/api/get_playlist_by_mood", params=params)) == ["edge", "middle"]
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+
+def test_playlist_keeps_mongo_limit_semantics(songs, client):
+    assert len(_titles(client.get("/get_playlist_by_mood", params={"k": 0}))) == 4
+    assert _titles(client.get("/get_playlist_by_mood", params={"k": -1})) == ["below"]
+    assert _titles(client.get("/get_playlist_by_mood", params={"k": 2})) == ["below", "edge"]
+
+
+def test_playlist_accepts_infinite_bounds(songs, client):
+    params = {"e_min": "-inf", "e_max": "inf"}
+    assert len(_titles(client.get("/get_playlist_by_mood", params=params))) == 4
+
+
+def test_recommend_by_song_shared_between_routes(songs, client):
+    params = {"song_id": str(songs.docs[1]["_id"]), "k": 2}
+    first = client.get("/recommend", params=params)
+    assert _titles(first) == ["edge", "below"]
+    assert client.get("/api/recommend", params=params).json() == first.json()
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+
+def test_features_upload_invalidates_cache(songs, client, monkeypatch):
+    monkeypatch.setattr(
+        main, "extract_features_from_bytes",
+        lambda data: {"energy": 0.5, "valence": 0.5, "danceability": 0.5, "tempo": 120.0},
+    )
+    assert "new" not in _titles(client.get("/recommend", params={"k": 10}))
+
+    response = client.post("/features", files={"file": ("new", b"riff")})
+    assert response.status_code == 200
+    assert client.get("/cache/stats").json()["version"] == 1
+    assert _titles(client.get("/recommend", params={"k": 1})) == ["new"]
+
+
+def test_cluster_run_invalidates_cache(songs, client):
+    params = {"cluster": 0}
+    assert _titles(client.get("/get_playlist_by_mood", params=params)) == []
+
+    response = client.post("/cluster/run", params={"k": 2})
+    assert response.json() == {"clusters": 2}
+    assert client.get("/cache/stats").json()["version"] == 1
+    assert _titles(client.get("/get_playlist_by_mood", params=params)) != []